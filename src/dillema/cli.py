@@ -1,17 +1,410 @@
 import argparse
+import os
+import subprocess
 import sys
-from typing import Optional, Sequence
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 
-from .commands import (
-    CommandExecutionError,
-    StartOptions,
-    deploy_model,
-    show_status,
-    start_cluster,
-)
+if TYPE_CHECKING:
+    import configparser
 
+# ``.commands`` and the web-only stdlib modules are imported where they are used, so each
+# subcommand only pays for the imports it actually needs.
 
-def main(argv: Optional[Sequence[str]] = None) -> None:
+_DOCKER_SOCKET = "/var/run/docker.sock"
+_DOCKER_CONFIG_HASHES = ("docker", "compose", "config", "--hash", "*")
+_DOCKER_PS_RUNNING = ("docker", "compose", "ps", "--format", "json", "--status", "running")
+_DOCKER_PULL = ("docker", "compose", "pull", "--quiet", "--ignore-pull-failures", "--policy", "missing")
+_DOCKER_UP = ("docker", "compose", "up", "-d")
+_CONFIG_HASH_LABEL = "com.docker.compose.config-hash"
+_NPM_INSTALL = ("npm", "install")
+_NPM_BUILD = ("npm", "run", "build")
+
+_MIGRATION_DB_ENV = ("POSTGRES_SERVER", "POSTGRES_PORT", "POSTGRES_DB")
+
+_FRONTEND_SOURCE_DIRS = ("src", "public")
+_FRONTEND_OUTPUT_DIRS = ("dist", "build")
+
+class _ChildProcesses:
+    """Children started from a worker thread, which the main thread can stop early."""
+
+    def __init__(self) -> None:
+        self.cancelled = threading.Event()
+        self._running: List[subprocess.Popen] = []
+
+    def run(self, command: Sequence[str], cwd: Path) -> int:
+        from .commands import _kill_child, _wait_for_exit
+
+        proc = subprocess.Popen(list(command), cwd=str(cwd))
+        self._running.append(proc)
+        try:
+            # Checked after registering the child, so a concurrent cancel() cannot miss it.
+            if self.cancelled.is_set():
+                proc.terminate()
+            return _wait_for_exit(proc)
+        except KeyboardInterrupt:
+            _kill_child(proc, interrupted=True)
+            raise
+        except BaseException:
+            _kill_child(proc)
+            raise
+        finally:
+            self._running.remove(proc)
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+        for proc in list(self._running):
+            proc.terminate()
+
+
+def _check_call(command: Sequence[str], cwd: Path, children: Optional[_ChildProcesses] = None) -> None:
+    """Run ``command`` in ``cwd``, raising ``CalledProcessError`` on a non-zero exit."""
+    from .commands import _spawn_and_wait
+
+    returncode = _spawn_and_wait(command, cwd=str(cwd)) if children is None else children.run(command, cwd)
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, list(command))
+
+
+@lru_cache(maxsize=1)
+def _docker_prefix() -> Tuple[str, ...]:
+    """Return ``("sudo",)`` only when the docker daemon socket is not accessible directly."""
+    if os.environ.get("DOCKER_HOST") or os.access(_DOCKER_SOCKET, os.R_OK | os.W_OK):
+        return ()
+    return ("sudo",)
+
+
+def _compose_config_hashes(web_cwd: Path) -> Dict[str, str]:
+    """Map each service compose would start in ``web_cwd`` to its config hash ({} if unknown).
+
+    Asks compose itself, so ``COMPOSE_FILE``, profiles, ``include:`` and ``extends`` resolve
+    exactly as they do for ``up -d``.
+    """
+    try:
+        result = subprocess.run(
+            [*_docker_prefix(), *_DOCKER_CONFIG_HASHES],
+            check=True,
+            cwd=str(web_cwd),
+            capture_output=True,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+
+    hashes: Dict[str, str] = {}
+    for line in result.stdout.splitlines():
+        service, _, config_hash = line.strip().partition(" ")
+        if not service or not config_hash.strip():
+            return {}
+        hashes[service] = config_hash.strip()
+    return hashes
+
+
+def _container_config_hash(entry: Dict[str, Any]) -> Optional[str]:
+    """Read the compose config-hash label from a ``docker compose ps`` JSON entry."""
+    labels = entry.get("Labels")
+    if isinstance(labels, dict):
+        return labels.get(_CONFIG_HASH_LABEL)
+    if isinstance(labels, str):
+        # A comma-joined ``key=value`` list; some values (config_files) contain commas themselves,
+        # but those fragments never start with the config-hash key.
+        for item in labels.split(","):
+            key, _, value = item.partition("=")
+            if key == _CONFIG_HASH_LABEL:
+                return value
+    return None
+
+
+def _running_compose_containers(web_cwd: Path) -> Optional[str]:
+    """Identify the running compose containers when the whole stack is up to date.
+
+    Every service must have a running container, and every container's config-hash label must
+    match the current configuration, otherwise ``up -d`` still has reconciliation to do.
+    Returns a ``service=container-id`` listing, or ``None`` if the stack needs ``up -d``.
+    """
+    import json
+
+    expected = _compose_config_hashes(web_cwd)
+    if not expected:
+        return None
+
+    try:
+        result = subprocess.run(
+            [*_docker_prefix(), *_DOCKER_PS_RUNNING],
+            check=True,
+            cwd=str(web_cwd),
+            capture_output=True,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    # Older Compose v2 releases print a JSON array, newer ones print one object per line.
+    output = result.stdout.strip()
+    try:
+        if output.startswith("["):
+            entries = json.loads(output)
+        else:
+            entries = [json.loads(line) for line in output.splitlines() if line.strip()]
+    except ValueError:
+        return None
+
+    entries = [entry for entry in entries if isinstance(entry, dict)]
+    for service, config_hash in expected.items():
+        containers = [entry for entry in entries if entry.get("Service") == service]
+        if not containers or any(_container_config_hash(entry) != config_hash for entry in containers):
+            return None
+    return ",".join(sorted(f"{entry.get('Service')}={entry.get('ID')}" for entry in entries))
+
+
+def _docker_up(web_cwd: Path) -> Optional[str]:
+    """Bring up the docker compose stack backing the web app.
+
+    ``up -d`` is skipped only when the running stack already matches the compose config.
+    Returns the running containers (see ``_running_compose_containers``) when the stack was
+    already up and left untouched, or ``None`` when ``up -d`` had to run.
+    """
+    containers = _running_compose_containers(web_cwd)
+    if containers is not None:
+        print(f"docker compose services already running and up to date; skipping up -d (cwd={web_cwd})")
+        return containers
+
+    # Fetch any missing images up front; compose pulls them concurrently, so ``up -d`` finds
+    # every layer locally. Failures are ignored and left for ``up -d`` to report.
+    print(f"Running: docker compose pull (cwd={web_cwd})")
+    try:
+        subprocess.run(
+            [*_docker_prefix(), *_DOCKER_PULL],
+            check=False,
+            cwd=str(web_cwd),
+        )
+    except OSError as exc:
+        print(f"Warning: docker compose pull failed: {exc}")
+
+    try:
+        print(f"Running: docker compose up -d (cwd={web_cwd})")
+        _check_call([*_docker_prefix(), *_DOCKER_UP], web_cwd)
+    except subprocess.CalledProcessError as exc:
+        print(f"docker compose failed: {exc}")
+        raise
+    return None
+
+
+def _cache_dir() -> Path:
+    """Per-user cache directory for dillema (honours ``XDG_CACHE_HOME``)."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(cache_home) / "dillema"
+
+
+def _database_revision() -> Optional[str]:
+    """Read the applied alembic revision(s) straight from the web app's Postgres database."""
+    try:
+        import psycopg2
+    except ImportError:
+        return None
+
+    try:
+        connection = psycopg2.connect(
+            host=os.environ.get("POSTGRES_SERVER", "localhost"),
+            port=os.environ.get("POSTGRES_PORT", "5432"),
+            dbname=os.environ.get("POSTGRES_DB"),
+            user=os.environ.get("POSTGRES_USER"),
+            password=os.environ.get("POSTGRES_PASSWORD"),
+            connect_timeout=3,
+        )
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT version_num FROM alembic_version ORDER BY version_num")
+                revisions = [row[0] for row in cursor.fetchall()]
+        finally:
+            connection.close()
+    except psycopg2.Error:
+        return None
+    return ",".join(revisions) or None
+
+
+def _migration_version_dirs(web_cwd: Path, config: "configparser.ConfigParser") -> Optional[List[Path]]:
+    """Resolve the directories alembic loads revision scripts from, or ``None`` if unsure.
+
+    Follows ``version_locations`` (split the way alembic splits it) when set, otherwise
+    ``<script_location>/versions``. Package-style ``pkg:path`` locations are not resolved.
+    """
+    script_location = config.get("alembic", "script_location")
+    locations_option = config.get("alembic", "version_locations", fallback="").strip()
+    if locations_option:
+        separator = config.get("alembic", "version_path_separator", fallback="").strip()
+        if separator == "os":
+            locations = locations_option.split(os.pathsep)
+        elif separator == "space":
+            locations = locations_option.split()
+        elif separator == "newline":
+            locations = locations_option.splitlines()
+        elif separator in (":", ";"):
+            locations = locations_option.split(separator)
+        else:
+            # alembic's legacy behaviour: split on commas and/or spaces.
+            locations = locations_option.replace(",", " ").split()
+    else:
+        locations = [str(Path(script_location) / "versions")]
+
+    version_dirs = []
+    for location in (entry.strip() for entry in locations):
+        if not location:
+            continue
+        if ":" in location and not Path(location).is_absolute():
+            return None
+        version_dir = web_cwd / location
+        if not version_dir.is_dir():
+            return None
+        version_dirs.append(version_dir)
+    return version_dirs or None
+
+
+def _migration_state_key(web_cwd: Path, containers: str) -> Optional[str]:
+    """Fingerprint the migration scripts, database containers and applied revision.
+
+    Returns ``None`` when any part cannot be determined (including version directories that
+    are missing or hold no scripts), in which case nothing is cached.
+    """
+    import configparser
+    import hashlib
+
+    config = configparser.ConfigParser(defaults={"here": str(web_cwd)})
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        config.read(web_cwd / "alembic.ini", encoding="utf-8")
+        version_dirs = _migration_version_dirs(web_cwd, config)
+        if version_dirs is None:
+            return None
+        scripts = 0
+        for index, versions_dir in enumerate(version_dirs):
+            for script in sorted(versions_dir.rglob("*.py")):
+                digest.update(f"{index}/{script.relative_to(versions_dir).as_posix()}".encode("utf-8") + b"\0")
+                digest.update(script.read_bytes() + b"\0")
+                scripts += 1
+    except (configparser.Error, OSError):
+        return None
+    if not scripts:
+        return None
+
+    revision = _database_revision()
+    if revision is None:
+        return None
+
+    database = ":".join(os.environ.get(name, "") for name in _MIGRATION_DB_ENV)
+    return f"{web_cwd.resolve()}|{digest.hexdigest()}|{database}|{containers}|{revision}"
+
+
+def _alembic_upgrade(web_cwd: Path, containers: Optional[str] = None) -> None:
+    """Apply pending database migrations for the web app.
+
+    ``containers`` identifies an already-running compose stack that was reused. Only then is
+    the migration fingerprint cached after a successful upgrade and trusted on later runs,
+    so alembic is skipped while the scripts, the database containers and the revision
+    recorded in the database are all unchanged.
+    """
+    cache_file = _cache_dir() / "alembic_head"
+    if containers is not None:
+        state_key = _migration_state_key(web_cwd, containers)
+        try:
+            if state_key is not None and cache_file.read_text(encoding="utf-8") == state_key:
+                print(f"Database already at alembic head; skipping upgrade (cwd={web_cwd})")
+                return
+        except OSError:
+            pass
+
+    try:
+        print(f"Running: alembic upgrade head (cwd={web_cwd})")
+        _check_call([sys.executable, "-m", "alembic", "upgrade", "head"], web_cwd)
+    except subprocess.CalledProcessError as exc:
+        print(f"alembic upgrade failed: {exc}")
+        raise
+
+    # Fingerprint after the upgrade so the recorded revision is the new head.
+    state_key = _migration_state_key(web_cwd, containers) if containers is not None else None
+    if state_key is not None:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            cache_file.write_text(state_key, encoding="utf-8")
+        except OSError as exc:
+            print(f"Warning: could not write {cache_file}: {exc}")
+
+
+def _frontend_source_hash(npm_cwd: Path) -> Optional[str]:
+    """Hash the frontend inputs: top-level files plus everything under ``src/`` and ``public/``."""
+    import hashlib
+
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        files = [path for path in npm_cwd.iterdir() if path.is_file()]
+        for name in _FRONTEND_SOURCE_DIRS:
+            source_dir = npm_cwd / name
+            if source_dir.is_dir():
+                files.extend(path for path in source_dir.rglob("*") if path.is_file())
+
+        for path in sorted(files):
+            digest.update(path.relative_to(npm_cwd).as_posix().encode("utf-8") + b"\0")
+            digest.update(path.read_bytes() + b"\0")
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _npm_build(npm_cwd: Path, children: Optional[_ChildProcesses] = None) -> None:
+    """Install frontend dependencies and build the static assets.
+
+    Skipped when the frontend inputs hash to the value recorded after the last successful
+    build and its output directory is still present.
+    """
+    import hashlib
+
+    # Recorded outside the project tree, keyed by the frontend directory it describes.
+    path_key = hashlib.blake2b(str(npm_cwd.resolve()).encode("utf-8"), digest_size=8).hexdigest()
+    hash_file = _cache_dir() / "frontend-build" / path_key
+    source_hash = _frontend_source_hash(npm_cwd)
+    if source_hash is not None and any((npm_cwd / name).is_dir() for name in _FRONTEND_OUTPUT_DIRS):
+        try:
+            if hash_file.read_text(encoding="utf-8").strip() == source_hash:
+                print(f"Frontend sources unchanged; skipping npm build (cwd={npm_cwd})")
+                return
+        except OSError:
+            pass
+
+    try:
+        print(f"Running: npm install (cwd={npm_cwd})")
+        _check_call(_NPM_INSTALL, npm_cwd, children)
+
+        print(f"Running: npm run build (cwd={npm_cwd})")
+        _check_call(_NPM_BUILD, npm_cwd, children)
+    except subprocess.CalledProcessError as exc:
+        if children is None or not children.cancelled.is_set():
+            print(f"npm build workflow failed: {exc}")
+        raise
+
+    if source_hash is not None:
+        try:
+            hash_file.parent.mkdir(parents=True, exist_ok=True)
+            hash_file.write_text(source_hash, encoding="utf-8")
+        except OSError as exc:
+            print(f"Warning: could not write {hash_file}: {exc}")
+
+
+def _positive_int(value: str) -> int:
+    """argparse ``type`` accepting only integers >= 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {number}")
+    return number
+
+
+@lru_cache(maxsize=None)
+def _build_parser() -> argparse.ArgumentParser:
+    """Construct the CLI argument parser (built once and reused across calls)."""
     parser = argparse.ArgumentParser(prog="dillema", description="Convenient wrappers around the Ray CLI and Serve APIs")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -30,7 +423,7 @@ def main(argv: Optional[Sequence[str]] = None) -> None:
     start_parser.add_argument("--web-port", type=int, default=8000, help="Port for the web server if --web is used")
     start_parser.add_argument("--no-docker", action="store_true", help="Skip running `docker compose up -d` before starting web")
     start_parser.add_argument("--no-migrate", action="store_true", help="Skip running `alembic upgrade head` before starting web")
-    start_parser.add_argument("--no-npm-build", action="store_true", help="Skip running `npm run build` after starting web")
+    start_parser.add_argument("--no-npm-build", action="store_true", help="Skip running `npm run build` while starting web")
 
     subparsers.add_parser("status", help="Show the current Ray cluster status")
 
@@ -47,21 +440,27 @@ def main(argv: Optional[Sequence[str]] = None) -> None:
         "--runtime-interface",
         help="Network interface to expose for collective backends (sets NCCL/GLOO socket IFNAME)",
     )
+    deploy_parser.add_argument(
+        "--max-ongoing-requests",
+        type=_positive_int,
+        help="Maximum number of in-flight requests per replica (defaults to Ray Serve's setting)",
+    )
+
+    return parser
 
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = _build_parser()
     args = parser.parse_args(argv)
 
     try:
         if args.command == "start":
             # If --web was requested, run the FastAPI app instead of starting Ray
             if getattr(args, "web", False):
-                # Run optional preparatory steps, then launch the FastAPI app via uvicorn,
-                # and finally run the frontend build.
-                import subprocess
-                import shlex
+                # Run optional preparatory steps, then launch the FastAPI app via uvicorn while
+                # the frontend build finishes in the background.
 
                 # determine working directory for web app commands. Prefer apps/RAGforge if present
-                from pathlib import Path
-
                 repo_root = Path.cwd()
                 ragforge_dir = repo_root / "apps" / "RAGforge"
                 web_cwd = ragforge_dir if ragforge_dir.exists() and ragforge_dir.is_dir() else repo_root
@@ -92,58 +491,66 @@ def main(argv: Optional[Sequence[str]] = None) -> None:
                     except ImportError:
                         print("Warning: python-dotenv not installed; skipping .env loading")
 
-                # 1) docker compose up -d (run in web_cwd so Dockerfile/docker-compose in apps/RAGforge is used)
-                if not getattr(args, "no_docker", False):
-                    try:
-                        print(f"Running: docker compose up -d (cwd={web_cwd})")
-                        subprocess.run(shlex.split("sudo docker compose up -d"), check=True, cwd=str(web_cwd))
-                    except subprocess.CalledProcessError as exc:
-                        print(f"docker compose failed: {exc}")
-                        raise
+                frontend_dir = web_cwd / "web"
+                npm_cwd = frontend_dir if frontend_dir.exists() and frontend_dir.is_dir() else web_cwd
 
-                # 2) alembic upgrade head (run in the same cwd so migrations config is found)
-                if not getattr(args, "no_migrate", False):
-                    try:
-                        print(f"Running: alembic upgrade head (cwd={web_cwd})")
-                        subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True, cwd=str(web_cwd))
-                    except subprocess.CalledProcessError as exc:
-                        print(f"alembic upgrade failed: {exc}")
-                        raise
+                from concurrent.futures import ThreadPoolExecutor
+
+                npm_children = _ChildProcesses()
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    # The frontend build only produces static assets, so it runs alongside the
+                    # docker/alembic chain instead of after it.
+                    npm_future = None
+                    if not getattr(args, "no_npm_build", False):
+                        npm_future = executor.submit(_npm_build, npm_cwd, npm_children)
 
-                # 3) start uvicorn app.main:app
-                web_cmd = [
-                    sys.executable,
-                    "-m",
-                    "uvicorn",
-                    "app.main:app",
-                    "--host",
-                    args.web_host,
-                    "--port",
-                    str(args.web_port),
-                ]
-                uvicorn_proc = subprocess.Popen(web_cmd, cwd=str(web_cwd))
-
-                # 4) npm install && npm run build (execute from web/ if available)
-                if not getattr(args, "no_npm_build", False):
                     try:
-                        frontend_dir = web_cwd / "web"
-                        npm_cwd = frontend_dir if frontend_dir.exists() and frontend_dir.is_dir() else web_cwd
-
-                        print(f"Running: npm install (cwd={npm_cwd})")
-                        subprocess.run(shlex.split("npm install"), check=True, cwd=str(npm_cwd))
-
-                        print(f"Running: npm run build (cwd={npm_cwd})")
-                        subprocess.run(shlex.split("npm run build"), check=True, cwd=str(npm_cwd))
-                    except subprocess.CalledProcessError as exc:
-                        print(f"npm build workflow failed: {exc}")
-                        # stop uvicorn if build fails
-                        uvicorn_proc.terminate()
+                        # 1) docker compose up -d (run in web_cwd so Dockerfile/docker-compose in apps/RAGforge is used)
+                        reused_containers = None
+                        if not getattr(args, "no_docker", False):
+                            reused_containers = _docker_up(web_cwd)
+
+                        # 2) alembic upgrade head (run in the same cwd so migrations config is found).
+                        # The cached head is only trusted for a reused stack; a fresh one (or one
+                        # managed outside dillema with --no-docker) may come with a new database.
+                        if not getattr(args, "no_migrate", False):
+                            _alembic_upgrade(web_cwd, reused_containers)
+
+                        # 3) start uvicorn app.main:app
+                        web_cmd = [
+                            sys.executable,
+                            "-m",
+                            "uvicorn",
+                            "app.main:app",
+                            "--host",
+                            args.web_host,
+                            "--port",
+                            str(args.web_port),
+                        ]
+                        uvicorn_proc = subprocess.Popen(web_cmd, cwd=str(web_cwd))
+                    except BaseException:
+                        # Surface the failure now instead of after the frontend build finishes.
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        npm_children.cancel()
                         raise
 
+                    # 4) wait for the frontend build started above
+                    if npm_future is not None:
+                        try:
+                            npm_future.result()
+                        except subprocess.CalledProcessError:
+                            # stop uvicorn if build fails
+                            uvicorn_proc.terminate()
+                            raise
+
                 # wait for uvicorn to exit (blocks until server stops)
-                uvicorn_proc.wait()
+                from .commands import _wait_for_exit
+
+                _wait_for_exit(uvicorn_proc)
                 return
 
+            from .commands import StartOptions, start_cluster
+
             start_cluster(
                 StartOptions(
                     head=args.head,
@@ -153,8 +560,12 @@ def main(argv: Optional[Sequence[str]] = None) -> None:
                 )
             )
         elif args.command == "status":
+            from .commands import show_status
+
             show_status()
         elif args.command == "deploy":
+            from .commands import deploy_model
+
             deploy_model(
                 model_source=args.model,
                 model_id=args.model_id,
@@ -165,10 +576,11 @@ def main(argv: Optional[Sequence[str]] = None) -> None:
                 gpu_memory_utilization=args.gpu_mem,
                 max_model_len=args.max_model_len,
                 runtime_interface=args.runtime_interface,
+                max_ongoing_requests=args.max_ongoing_requests,
             )
         else:  # pragma: no cover - argparse ensures command is valid
             parser.error("Unknown command")
-    except (ValueError, CommandExecutionError, RuntimeError) as exc:
+    except (ValueError, RuntimeError) as exc:  # CommandExecutionError is a RuntimeError
         parser.exit(status=1, message=f"Error: {exc}\n")
 
 
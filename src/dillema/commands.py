@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import os
+import selectors
 import shutil
 import subprocess
 import sys
 from dataclasses import dataclass
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import IO, Any, Dict, Optional, Sequence, Tuple
 
 
 __all__ = [
@@ -16,6 +19,20 @@ __all__ = [
 ]
 
 
+_PYTHON = sys.executable
+_READ_CHUNK = 64 * 1024
+_SIGINT_GRACE_SECS = 0.25  # matches subprocess's grace period for children on Ctrl-C
+_QUOTE_CHARS = frozenset({"'", '"'})
+
+# Runtime environment shared by every Serve replica on every node; only an explicit
+# --runtime-interface overrides the socket interfaces.
+_STATIC_ENV: Dict[str, str] = {
+    "VLLM_USE_V1": "1",
+    "GLOO_SOCKET_IFNAME": "enp132s0",
+    "NCCL_SOCKET_IFNAME": "enp132s0",
+}
+
+
 class CommandExecutionError(RuntimeError):
     """Raised when an underlying Ray command fails."""
 
@@ -28,28 +45,150 @@ class StartOptions:
     dashboard_host: str = "0.0.0.0"
 
 
-def _run_ray_subprocess(*args: str) -> None:
-    """Invoke the Ray CLI and stream output."""
-    ray_executable = shutil.which("ray")
-    command = [ray_executable, *args] if ray_executable else [sys.executable, "-m", "ray", *args]
+def _wait_for_exit(proc: subprocess.Popen) -> int:
+    """Block until ``proc`` exits and return its exit code.
+
+    Reaps the child through a pidfd with ``os.waitid(P_PIDFD)`` where the platform supports
+    it (Linux 5.3+), which cannot race with PID reuse; falls back to ``Popen.wait``.
+    """
+    if proc.returncode is not None:
+        return proc.returncode
 
     try:
-        subprocess.run(command, check=True)
-        return
-    except FileNotFoundError:
-        fallback = [sys.executable, "-m", "ray", *args]
+        pidfd = os.pidfd_open(proc.pid)
+    except (AttributeError, OSError):
+        return proc.wait()
+
+    try:
+        info = os.waitid(os.P_PIDFD, pidfd, os.WEXITED)
+    except (AttributeError, OSError):
+        return proc.wait()
+    finally:
+        os.close(pidfd)
+
+    # Mirror Popen's convention of negative return codes for signal-terminated children.
+    proc.returncode = info.si_status if info.si_code == os.CLD_EXITED else -info.si_status
+    return proc.returncode
+
+
+def _kill_child(proc: subprocess.Popen, interrupted: bool = False) -> None:
+    """Kill and reap ``proc`` after the wait for it was aborted.
+
+    On Ctrl-C the child received the same SIGINT, so, like ``subprocess.run``, it first gets
+    a short grace period to exit on its own.
+    """
+    if interrupted:
         try:
-            subprocess.run(fallback, check=True)
-            return
-        except subprocess.CalledProcessError as exc:  # pragma: no cover - bubble up context for CLI
-            raise CommandExecutionError(f"Ray command failed: {' '.join(fallback)}") from exc
-    except subprocess.CalledProcessError as exc:
-        raise CommandExecutionError(f"Ray command failed: {' '.join(command)}") from exc
+            proc.wait(timeout=_SIGINT_GRACE_SECS)
+        except subprocess.TimeoutExpired:
+            pass
+    proc.kill()
+    proc.wait()
+
+
+def _spawn_and_wait(command: Sequence[str], cwd: Optional[str] = None) -> int:
+    """Run ``command`` to completion and return its exit code."""
+    proc = subprocess.Popen(list(command), cwd=cwd)
+    try:
+        return _wait_for_exit(proc)
+    except KeyboardInterrupt:
+        _kill_child(proc, interrupted=True)
+        raise
+    except BaseException:
+        _kill_child(proc)
+        raise
+
+
+def _relay(fd: int, sink: IO[str]) -> bool:
+    """Copy whatever is readable on ``fd`` to ``sink``; return ``False`` once it hits EOF."""
+    while True:
+        try:
+            data = os.read(fd, _READ_CHUNK)
+        except BlockingIOError:
+            return True
+        if not data:
+            return False
+        buffer = getattr(sink, "buffer", None)
+        if buffer is not None:
+            sink.flush()
+            buffer.write(data)
+            buffer.flush()
+        else:
+            sink.write(data.decode(errors="replace"))
+            sink.flush()
+
+
+def _stream_and_wait(command: Sequence[str]) -> int:
+    """Run ``command``, relaying its stdout/stderr through non-blocking pipes, and return its exit code.
+
+    Output is drained until both pipes reach EOF, so only use this for commands that leave no
+    background processes holding them (``ray status``, not ``ray start``).
+    """
+    # The Ray CLI is itself Python; keep it from block-buffering output written to a pipe.
+    env = {**os.environ, "PYTHONUNBUFFERED": "1"}
+    proc = subprocess.Popen(
+        list(command),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+    )
+    assert proc.stdout is not None and proc.stderr is not None
+
+    selector = selectors.DefaultSelector()
+    pipes = {proc.stdout.fileno(): sys.stdout, proc.stderr.fileno(): sys.stderr}
+    try:
+        for fd, sink in pipes.items():
+            os.set_blocking(fd, False)
+            selector.register(fd, selectors.EVENT_READ, sink)
+
+        while pipes:
+            for key, _ in selector.select():
+                if not _relay(key.fd, key.data):
+                    selector.unregister(key.fd)
+                    del pipes[key.fd]
+    except KeyboardInterrupt:
+        _kill_child(proc, interrupted=True)
+        raise
+    except BaseException:
+        _kill_child(proc)
+        raise
+    finally:
+        selector.close()
+        proc.stdout.close()
+        proc.stderr.close()
+
+    return _wait_for_exit(proc)
+
+
+@lru_cache(maxsize=1)
+def _ray_executable() -> Optional[str]:
+    """Locate the ``ray`` entry point on ``PATH`` once per process."""
+    return shutil.which("ray")
+
+
+@lru_cache(maxsize=1)
+def _ray_command() -> Tuple[str, ...]:
+    """Command prefix for the Ray CLI: the ``ray`` entry point, or ``python -m ray`` without one."""
+    ray_executable = _ray_executable()
+    return (ray_executable,) if ray_executable else (_PYTHON, "-m", "ray")
+
+
+def _run_ray_subprocess(*args: str, relay_output: bool = False) -> None:
+    """Invoke the Ray CLI and stream output.
+
+    With ``relay_output`` the output is piped through this process; otherwise the child inherits
+    the terminal, which ``ray start`` needs because the daemons it launches inherit its stdio.
+    """
+    command = [*_ray_command(), *args]
+    run = _stream_and_wait if relay_output else _spawn_and_wait
+    if run(command):
+        raise CommandExecutionError(f"Ray command failed: {' '.join(command)}")
 
 
 def start_cluster(options: StartOptions) -> None:
     """Start a Ray head or worker node based on the provided options."""
-    if options.head == options.worker:
+    if not (options.head ^ options.worker):
         raise ValueError("Specify exactly one of --head or --worker")
 
     if options.head:
@@ -59,13 +198,16 @@ def start_cluster(options: StartOptions) -> None:
     if not options.address:
         raise ValueError("--address is required when starting a worker node")
 
-    sanitized = options.address.strip("'\"")
-    _run_ray_subprocess("start", f"--address={sanitized}")
+    address = options.address
+    # Only strip when the address is actually quoted (e.g. copied verbatim from ``ray start`` output).
+    if address[:1] in _QUOTE_CHARS or address[-1:] in _QUOTE_CHARS:
+        address = address.strip("'\"")
+    _run_ray_subprocess("start", f"--address={address}")
 
 
 def show_status() -> None:
     """Display the current Ray cluster status."""
-    _run_ray_subprocess("status")
+    _run_ray_subprocess("status", relay_output=True)
 
 
 def deploy_model(
@@ -78,6 +220,7 @@ def deploy_model(
     gpu_memory_utilization: float = 0.9,
     max_model_len: int = 22000,
     runtime_interface: Optional[str] = None,
+    max_ongoing_requests: Optional[int] = None,
 ) -> None:
     """Deploy an LLM using Ray Serve with sensible defaults."""
 
@@ -86,41 +229,69 @@ def deploy_model(
     # except ImportError as exc:  # pragma: no cover - dependency missing
     #     raise RuntimeError("Ray Serve is required. Install the 'ray[serve]' extra.") from exc
 
+    import asyncio
+
     from ray import serve
     from ray.serve.llm import LLMConfig, build_openai_app
     inferred_id = model_id or _derive_model_id(model_source)
-    env_vars: Dict[str, str] = {"VLLM_USE_V1": "1"}
-
-    env_vars["GLOO_SOCKET_IFNAME"] = "enp132s0"
-    env_vars["NCCL_SOCKET_IFNAME"] = "enp132s0"
-    # if runtime_interface:
-    #     env_vars["GLOO_SOCKET_IFNAME"] = runtime_interface
-    #     env_vars["NCCL_SOCKET_IFNAME"] = runtime_interface
+    env_vars: Dict[str, str] = {
+        **_STATIC_ENV,
+        **(
+            {"GLOO_SOCKET_IFNAME": runtime_interface, "NCCL_SOCKET_IFNAME": runtime_interface}
+            if runtime_interface
+            else {}
+        ),
+    }
 
     serve.start(http_options={"host": http_host, "port": http_port})
 
+    deployment_config: Dict[str, Any] = {"autoscaling_config": {"min_replicas": 1, "max_replicas": 1}}
+    if max_ongoing_requests is not None:
+        deployment_config["max_ongoing_requests"] = max_ongoing_requests
+
+    engine_kwargs: Dict[str, Any] = {
+        "tensor_parallel_size": tensor_parallel_size,
+        "pipeline_parallel_size": pipeline_parallel_size,
+        "trust_remote_code": True,
+        "gpu_memory_utilization": gpu_memory_utilization,
+        "max_model_len": max_model_len,
+    }
+
     llm_config = LLMConfig(
         model_loading_config={
             "model_id": inferred_id,
             "model_source": model_source,
         },
-        deployment_config={"autoscaling_config": {"min_replicas": 1, "max_replicas": 1}},
-        engine_kwargs={
-            "tensor_parallel_size": tensor_parallel_size,
-            "pipeline_parallel_size": pipeline_parallel_size,
-            "trust_remote_code": True,
-            "gpu_memory_utilization": gpu_memory_utilization,
-            "max_model_len": max_model_len,
-        },
+        deployment_config=deployment_config,
+        engine_kwargs=engine_kwargs,
         runtime_env={"env_vars": env_vars},
     )
 
     app = build_openai_app({"llm_configs": [llm_config]})
-    serve.run(app, blocking=True)
+    serve.run(app, blocking=False)
+    asyncio.run(_serve_forever())
+
+
+async def _serve_forever() -> None:
+    """Keep the driver alive after ``serve.run`` until SIGINT or SIGTERM arrives."""
+    import asyncio
+    import signal
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):  # pragma: no cover - e.g. Windows event loops
+            pass
+
+    await stop.wait()
+    print("Received shutdown signal; exiting.")
 
 
+@lru_cache(maxsize=64)
 def _derive_model_id(model_source: str) -> str:
     """Produce an identifier when the caller omits --model-id."""
-    candidate = model_source.rsplit("/", maxsplit=1)[-1]
+    candidate = model_source.rpartition("/")[2]
     sanitized = candidate.replace("-Instruct", "").replace("_", "-")
     return sanitized or "llm"
@@ -0,0 +1,105 @@
+import json
+import subprocess
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from dillema import cli
+
+CONFIG_FILES_LABEL = "com.docker.compose.project.config_files=/app/docker-compose.yml,/app/docker-compose.override.yml"
+
+
+def _container(service, container_id, config_hash):
+    labels = f"com.docker.compose.config-hash={config_hash},{CONFIG_FILES_LABEL}"
+    return {"Service": service, "ID": container_id, "State": "running", "Labels": labels}
+
+
+class FakeCompose:
+    """Stand-in for ``subprocess.run`` answering ``config --hash`` and ``ps`` queries."""
+
+    def __init__(self, hashes, ps_output, ps_fails=False):
+        self.hashes = hashes
+        self.ps_output = ps_output
+        self.ps_fails = ps_fails
+
+    def __call__(self, command, **kwargs):
+        if command[:3] == ["docker", "compose", "config"]:
+            stdout = "".join(f"{service} {config_hash}\n" for service, config_hash in self.hashes.items())
+            return subprocess.CompletedProcess(command, 0, stdout=stdout, stderr="")
+        if command[:3] == ["docker", "compose", "ps"]:
+            if self.ps_fails:
+                raise subprocess.CalledProcessError(1, command)
+            return subprocess.CompletedProcess(command, 0, stdout=self.ps_output, stderr="")
+        return subprocess.CompletedProcess(command, 0, stdout="", stderr="")
+
+
+class RunningComposeContainersTest(unittest.TestCase):
+    hashes = {"db": "aaa", "redis": "bbb"}
+
+    def setUp(self):
+        mock.patch.object(cli, "_docker_prefix", return_value=()).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _running(self, fake):
+        with mock.patch.object(cli.subprocess, "run", fake):
+            return cli._running_compose_containers(Path("."))
+
+    def test_json_array_output(self):
+        output = json.dumps([_container("db", "c1", "aaa"), _container("redis", "c2", "bbb")])
+        self.assertEqual(self._running(FakeCompose(self.hashes, output)), "db=c1,redis=c2")
+
+    def test_json_lines_output(self):
+        output = "\n".join(json.dumps(entry) for entry in (_container("redis", "c2", "bbb"), _container("db", "c1", "aaa")))
+        self.assertEqual(self._running(FakeCompose(self.hashes, output)), "db=c1,redis=c2")
+
+    def test_missing_service_needs_up(self):
+        output = json.dumps(_container("db", "c1", "aaa"))
+        self.assertIsNone(self._running(FakeCompose(self.hashes, output)))
+
+    def test_stale_config_hash_needs_up(self):
+        output = json.dumps([_container("db", "c1", "old"), _container("redis", "c2", "bbb")])
+        self.assertIsNone(self._running(FakeCompose(self.hashes, output)))
+
+    def test_missing_label_needs_up(self):
+        entries = [{"Service": "db", "ID": "c1", "Labels": ""}, _container("redis", "c2", "bbb")]
+        self.assertIsNone(self._running(FakeCompose(self.hashes, json.dumps(entries))))
+
+    def test_dict_labels(self):
+        entries = [
+            {"Service": "db", "ID": "c1", "Labels": {"com.docker.compose.config-hash": "aaa"}},
+            _container("redis", "c2", "bbb"),
+        ]
+        self.assertEqual(self._running(FakeCompose(self.hashes, json.dumps(entries))), "db=c1,redis=c2")
+
+    def test_unparsable_ps_output_needs_up(self):
+        self.assertIsNone(self._running(FakeCompose(self.hashes, "not json")))
+
+    def test_ps_failure_needs_up(self):
+        self.assertIsNone(self._running(FakeCompose(self.hashes, "", ps_fails=True)))
+
+    def test_unknown_services_need_up(self):
+        output = json.dumps([_container("db", "c1", "aaa")])
+        self.assertIsNone(self._running(FakeCompose({}, output)))
+
+
+class DockerUpTest(unittest.TestCase):
+    def setUp(self):
+        mock.patch.object(cli, "_docker_prefix", return_value=()).start()
+        self.check_call = mock.patch.object(cli, "_check_call").start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_up_to_date_stack_skips_up(self):
+        fake = FakeCompose({"db": "aaa"}, json.dumps([_container("db", "c1", "aaa")]))
+        with mock.patch.object(cli.subprocess, "run", fake):
+            self.assertEqual(cli._docker_up(Path(".")), "db=c1")
+        self.check_call.assert_not_called()
+
+    def test_missing_service_runs_up(self):
+        fake = FakeCompose({"db": "aaa", "redis": "bbb"}, json.dumps([_container("db", "c1", "aaa")]))
+        with mock.patch.object(cli.subprocess, "run", fake):
+            self.assertIsNone(cli._docker_up(Path(".")))
+        self.check_call.assert_called_once_with(["docker", "compose", "up", "-d"], Path("."))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+from dillema import cli
+
+
+class FrontendBuildTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.npm_cwd = Path(tmp.name) / "frontend"
+        (self.npm_cwd / "src").mkdir(parents=True)
+        (self.npm_cwd / "package.json").write_text("{}\n", encoding="utf-8")
+        (self.npm_cwd / "src" / "main.js").write_text("console.log(1)\n", encoding="utf-8")
+        self.cache_home = Path(tmp.name) / "cache"
+
+        mock.patch.dict(os.environ, {"XDG_CACHE_HOME": str(self.cache_home)}).start()
+        self.check_call = mock.patch.object(cli, "_check_call", side_effect=self._fake_build).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _fake_build(self, command, cwd, children=None):
+        if tuple(command) == cli._NPM_BUILD:
+            (cwd / "dist").mkdir(exist_ok=True)
+
+    def _build(self):
+        with redirect_stdout(io.StringIO()):
+            cli._npm_build(self.npm_cwd)
+
+    def test_hash_tracks_sources_and_env(self):
+        before = cli._frontend_source_hash(self.npm_cwd)
+        (self.npm_cwd / ".env").write_text("VITE_API=http://localhost\n", encoding="utf-8")
+        with_env = cli._frontend_source_hash(self.npm_cwd)
+        (self.npm_cwd / "src" / "main.js").write_text("console.log(2)\n", encoding="utf-8")
+        self.assertEqual(len({before, with_env, cli._frontend_source_hash(self.npm_cwd)}), 3)
+
+    def test_unchanged_sources_skip_build(self):
+        self._build()
+        self._build()
+        self.assertEqual(self.check_call.call_count, 2)
+
+    def test_changed_sources_rebuild(self):
+        self._build()
+        (self.npm_cwd / "src" / "main.js").write_text("console.log(2)\n", encoding="utf-8")
+        self._build()
+        self.assertEqual(self.check_call.call_count, 4)
+
+    def test_missing_output_dir_rebuilds(self):
+        self._build()
+        (self.npm_cwd / "dist").rmdir()
+        self._build()
+        self.assertEqual(self.check_call.call_count, 4)
+
+    def test_hash_is_recorded_outside_the_tree(self):
+        self._build()
+        self.assertEqual(len(list((self.cache_home / "dillema" / "frontend-build").iterdir())), 1)
+        self.assertEqual(sorted(path.name for path in self.npm_cwd.iterdir()), ["dist", "package.json", "src"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import io
+import os
+import sys
+import tempfile
+import types
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+from dillema import cli
+
+CONTAINERS = "db=c1"
+
+
+def _fake_psycopg2(revisions):
+    """Build a stand-in ``psycopg2`` module whose ``alembic_version`` holds ``revisions``."""
+    module = types.ModuleType("psycopg2")
+
+    class Error(Exception):
+        pass
+
+    cursor = mock.MagicMock()
+    cursor.__enter__.return_value = cursor
+    cursor.fetchall.side_effect = lambda: [(revision,) for revision in revisions]
+    connection = mock.MagicMock()
+    connection.cursor.return_value = cursor
+
+    module.Error = Error
+    module.connect = mock.MagicMock(return_value=connection)
+    return module
+
+
+class MigrationTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.web_cwd = Path(tmp.name) / "web"
+        self.versions = self.web_cwd / "alembic" / "versions"
+        self.versions.mkdir(parents=True)
+        self._write_ini("script_location = %(here)s/alembic\n")
+        (self.versions / "0001_initial.py").write_text("revision = '0001'\n", encoding="utf-8")
+
+        self.revisions = ["0001"]
+        mock.patch.dict(sys.modules, {"psycopg2": _fake_psycopg2(self.revisions)}).start()
+        mock.patch.dict(os.environ, {"XDG_CACHE_HOME": str(Path(tmp.name) / "cache")}).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _write_ini(self, options):
+        (self.web_cwd / "alembic.ini").write_text(f"[alembic]\n{options}", encoding="utf-8")
+
+
+class MigrationStateKeyTest(MigrationTestCase):
+    def test_key_includes_containers_and_revision(self):
+        key = cli._migration_state_key(self.web_cwd, CONTAINERS)
+        self.assertIsNotNone(key)
+        self.assertTrue(key.endswith(f"|{CONTAINERS}|0001"))
+
+    def test_new_script_changes_key(self):
+        before = cli._migration_state_key(self.web_cwd, CONTAINERS)
+        (self.versions / "0002_add_table.py").write_text("revision = '0002'\n", encoding="utf-8")
+        self.assertNotEqual(cli._migration_state_key(self.web_cwd, CONTAINERS), before)
+
+    def test_missing_versions_dir_returns_none(self):
+        self._write_ini("script_location = %(here)s/migrations\n")
+        self.assertIsNone(cli._migration_state_key(self.web_cwd, CONTAINERS))
+
+    def test_empty_versions_dir_returns_none(self):
+        (self.versions / "0001_initial.py").unlink()
+        self.assertIsNone(cli._migration_state_key(self.web_cwd, CONTAINERS))
+
+    def test_version_locations_are_honoured(self):
+        extra = self.web_cwd / "extra_versions"
+        extra.mkdir()
+        self._write_ini(
+            "script_location = %(here)s/alembic\n"
+            "version_locations = %(here)s/alembic/versions %(here)s/extra_versions\n"
+        )
+        before = cli._migration_state_key(self.web_cwd, CONTAINERS)
+        (extra / "0002_extra.py").write_text("revision = '0002'\n", encoding="utf-8")
+        self.assertNotEqual(cli._migration_state_key(self.web_cwd, CONTAINERS), before)
+
+    def test_package_location_returns_none(self):
+        self._write_ini("script_location = %(here)s/alembic\nversion_locations = myapp:versions\n")
+        self.assertIsNone(cli._migration_state_key(self.web_cwd, CONTAINERS))
+
+    def test_without_psycopg2_returns_none(self):
+        with mock.patch.dict(sys.modules, {"psycopg2": None}):
+            self.assertIsNone(cli._migration_state_key(self.web_cwd, CONTAINERS))
+
+
+class AlembicUpgradeTest(MigrationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.check_call = mock.patch.object(cli, "_check_call").start()
+
+    def _upgrade(self, containers=CONTAINERS):
+        with redirect_stdout(io.StringIO()):
+            cli._alembic_upgrade(self.web_cwd, containers)
+
+    def test_new_script_invalidates_cache(self):
+        self._upgrade()
+        self._upgrade()
+        self.assertEqual(self.check_call.call_count, 1)
+
+        (self.versions / "0002_add_table.py").write_text("revision = '0002'\n", encoding="utf-8")
+        self._upgrade()
+        self.assertEqual(self.check_call.call_count, 2)
+
+    def test_changed_database_revision_invalidates_cache(self):
+        self._upgrade()
+        self.revisions[:] = ["0000"]
+        self._upgrade()
+        self.assertEqual(self.check_call.call_count, 2)
+
+    def test_started_stack_never_uses_cache(self):
+        self._upgrade(containers=None)
+        self._upgrade(containers=None)
+        self.assertEqual(self.check_call.call_count, 2)
+        self.assertFalse((cli._cache_dir() / "alembic_head").exists())
+
+    def test_missing_versions_dir_is_not_cached(self):
+        self._write_ini("script_location = %(here)s/migrations\n")
+        self._upgrade()
+        self._upgrade()
+        self.assertEqual(self.check_call.call_count, 2)
+        self.assertFalse((cli._cache_dir() / "alembic_head").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()